@@ -1,40 +1,147 @@
-from flask import Flask, render_template, request, jsonify, send_file
-import boto3
+from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, Response, stream_with_context
+from flask.json.provider import JSONProvider
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 import re
-from datetime import datetime
 import json
+import uuid
+import hashlib
+import codecs
+import io
+from xml.sax.saxutils import escape
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from polly_utils import (POLLY_CONFIG, BatchCoalescer, create_polly_client, describe_voices_cached,
+                         refresh_voices_cache, split_mp3)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson for faster API responses"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'output'
+app.config['CACHE_FOLDER'] = os.path.join(app.config['OUTPUT_FOLDER'], 'cache')
+app.config['CACHE_MAX_BYTES'] = int(os.getenv('CACHE_MAX_BYTES', 500 * 1024 * 1024))
+app.config['MAX_TEXT_CHARS'] = int(os.getenv('MAX_TEXT_CHARS', 100000))
+# Polly calls are IO-bound, so concurrency is sized to the client's
+# connection pool rather than to the number of web server workers
+app.config['POLLY_CONCURRENCY'] = POLLY_CONFIG.max_pool_connections
+app.config['GENERATE_WORKERS'] = int(os.getenv('GENERATE_WORKERS', POLLY_CONFIG.max_pool_connections))
+# Short snippets arriving within the window are synthesized in one call
+app.config['BATCH_WINDOW_MS'] = int(os.getenv('BATCH_WINDOW_MS', 100))
+app.config['BATCH_MAX_ITEMS'] = int(os.getenv('BATCH_MAX_ITEMS', 8))
+app.config['BATCH_ITEM_MAX_CHARS'] = int(os.getenv('BATCH_ITEM_MAX_CHARS', 500))
+# Half the neural per-request limit, leaving room for the mark tags
+app.config['BATCH_MAX_CHARS'] = int(os.getenv('BATCH_MAX_CHARS', 1500))
+app.config['STATUS_POLL_INTERVAL_MS'] = int(os.getenv('STATUS_POLL_INTERVAL_MS', 500))
+# Finished jobs nobody polled for are dropped after this long
+app.config['JOB_TTL_SECONDS'] = int(os.getenv('JOB_TTL_SECONDS', 3600))
 
 # Create necessary folders
 Path(app.config['UPLOAD_FOLDER']).mkdir(exist_ok=True)
 Path(app.config['OUTPUT_FOLDER']).mkdir(exist_ok=True)
+Path(app.config['CACHE_FOLDER']).mkdir(exist_ok=True)
+
+# Resolved once so downloads don't re-resolve the folder per request (and
+# so files are found where they were written, whatever app.root_path is)
+CACHE_DIR = str(Path(app.config['CACHE_FOLDER']).resolve())
+
+# Sentence ends get a longer pause than commas
+_RE_PAUSE = re.compile(r'([.!?,])\s+')
+_PAUSE_BREAKS = {
+    ',': '<break time="300ms"/> ',
+    '.': '<break time="500ms"/> ',
+    '!': '<break time="500ms"/> ',
+    '?': '<break time="500ms"/> ',
+}
+
+_RE_SENTENCE = re.compile(r'(?<=[.!?])(\s+)')
+
+def _split_text(text, max_chars):
+    """Greedily pack sentences into chunks of at most max_chars"""
+    if len(text) <= max_chars:
+        return [text]
+    
+    # Splitting with a capture group keeps the original separators, so
+    # newlines and paragraph breaks inside a chunk survive
+    pieces = _RE_SENTENCE.split(text)
+    sentences = pieces[0::2]
+    separators = pieces[1::2] + ['']
+    
+    chunks = []
+    current = ''
+    for sentence, separator in zip(sentences, separators):
+        # Sentences longer than a chunk are cut at the last whitespace that fits
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(ch, 0, max_chars + 1) for ch in ' \t\n')
+            if cut <= 0:
+                cut = max_chars
+            if current.strip():
+                chunks.append(current.rstrip())
+            current = ''
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        
+        if current.strip() and len(current) + len(sentence) > max_chars:
+            chunks.append(current.rstrip())
+            current = ''
+        current += sentence + separator
+    
+    if current.strip():
+        chunks.append(current.rstrip())
+    return chunks
+
+STREAM_CHUNK_SIZE = 8 * 1024
+UPLOAD_BLOCK_SIZE = 64 * 1024
 
 class PodcastGenerator:
     def __init__(self):
-        self.polly_client = boto3.client(
-            'polly',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-east-1')
+        self.polly_client = create_polly_client()
+        self.cache_lock = threading.Lock()
+        self.coalescer = BatchCoalescer(
+            self.synthesize_batch,
+            window_ms=app.config['BATCH_WINDOW_MS'],
+            max_items=app.config['BATCH_MAX_ITEMS'],
+            max_chars=app.config['BATCH_MAX_CHARS']
         )
-        self.ssml_wrapper = '<speak>{}</speak>'
+        # Open a pooled connection and resolve credentials before the first request
+        threading.Thread(target=self._warmup, daemon=True).start()
+    
+    def _warmup(self):
+        """Prime the Polly connection pool and refresh the voices cache"""
+        try:
+            refresh_voices_cache(self.polly_client)
+        except Exception as e:
+            print(f"Polly warm-up failed: {e}")
     
     def get_available_voices(self):
         """Get all available voices grouped by language"""
         try:
-            response = self.polly_client.describe_voices()
             voices = {}
             
-            for voice in response['Voices']:
+            for voice in describe_voices_cached(self.polly_client):
                 lang = voice['LanguageCode']
                 if lang not in voices:
                     voices[lang] = []
@@ -53,55 +160,203 @@ class PodcastGenerator:
             print(f"Error fetching voices: {e}")
             return {}
     
-    def add_ssml_pauses(self, text):
-        """Add natural pauses using SSML"""
-        text = re.sub(r'([.!?])\s+', r'\1<break time="500ms"/> ', text)
-        text = re.sub(r'(,)\s+', r'\1<break time="300ms"/> ', text)
-        return text
-    
     def create_ssml_with_prosody(self, text, rate='medium', pitch='medium'):
-        """Create SSML with prosody controls"""
-        text = self.add_ssml_pauses(text)
-        prosody_text = f'<prosody rate="{rate}" pitch="{pitch}">{text}</prosody>'
-        return self.ssml_wrapper.format(prosody_text)
+        """Create SSML with prosody controls and natural pauses in a single scan"""
+        buf = io.StringIO()
+        buf.write(f'<speak><prosody rate="{rate}" pitch="{pitch}">')
+        pos = 0
+        for match in _RE_PAUSE.finditer(text):
+            buf.write(text[pos:match.end(1)])
+            buf.write(_PAUSE_BREAKS[match.group(1)])
+            pos = match.end()
+        buf.write(text[pos:])
+        buf.write('</prosody></speak>')
+        return buf.getvalue()
+    
+    def cache_key(self, text, voice_id, engine, use_ssml, rate, pitch):
+        """Hash the synthesis parameters into a cache key"""
+        params = json.dumps([text, voice_id, engine, use_ssml, rate, pitch], sort_keys=True)
+        return hashlib.blake2b(params.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def prune_cache(self):
+        """Evict least recently used audio files once the cache exceeds its size limit"""
+        with self.cache_lock:
+            entries = []
+            total = 0
+            with os.scandir(CACHE_DIR) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.mp3'):
+                        stat = entry.stat()
+                        entries.append((stat.st_atime, stat.st_size, entry.path))
+                        total += stat.st_size
+            
+            entries.sort()
+            for _, size, path in entries:
+                if total <= app.config['CACHE_MAX_BYTES']:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+    
+    def cache_path(self, text, voice_id, engine, use_ssml, rate, pitch):
+        """Return the cache filename and path for a set of synthesis parameters"""
+        key = self.cache_key(text, voice_id, engine, use_ssml, rate, pitch)
+        filename = f"podcast_{voice_id}_{key}.mp3"
+        return filename, os.path.join(CACHE_DIR, filename)
+    
+    def chunk_text(self, text, engine, use_ssml):
+        """Split text into pieces that fit in a single Polly request"""
+        # SSML chunks get half the budget to leave room for the markup
+        max_chars = 3000 if engine == 'neural' else 6000
+        if use_ssml:
+            max_chars //= 2
+        return _split_text(text, max_chars)
+    
+    def synthesize_chunk(self, text, voice_id, engine, use_ssml, rate, pitch):
+        """Synthesize a single request-sized piece of text and return MP3 bytes"""
+        return self.synthesize_stream(text, voice_id, engine, use_ssml, rate, pitch).read()
+    
+    def synthesize_stream(self, text, voice_id, engine, use_ssml, rate, pitch):
+        """Start synthesizing a single piece of text and return Polly's audio stream"""
+        if use_ssml:
+            ssml_text = self.create_ssml_with_prosody(text, rate, pitch)
+            response = self.polly_client.synthesize_speech(
+                Text=ssml_text,
+                TextType='ssml',
+                OutputFormat='mp3',
+                VoiceId=voice_id,
+                Engine=engine
+            )
+        else:
+            response = self.polly_client.synthesize_speech(
+                Text=text,
+                OutputFormat='mp3',
+                VoiceId=voice_id,
+                Engine=engine
+            )
+        return response['AudioStream']
+    
+    def submit_plain(self, text, voice_id, engine):
+        """Queue one plain-text snippet on the shared pool and return its Future"""
+        # Submits synthesize_chunk itself: a pool task that waited on another
+        # pool task could deadlock once every worker was doing the same
+        return synth_executor.submit(
+            self.synthesize_chunk, text, voice_id, engine, False, 'medium', 'medium'
+        )
+    
+    def synthesize_batch(self, key, texts):
+        """Synthesize several short plain texts in one Polly call and split the audio per text"""
+        voice_id, engine = key
+        if len(texts) == 1:
+            return [self.submit_plain(texts[0], voice_id, engine).result()]
+        
+        try:
+            return self._synthesize_marked(texts, voice_id, engine)
+        except Exception as e:
+            print(f"Batched synthesis failed, retrying individually: {e}")
+        
+        # Retry each text on its own so one failure doesn't affect the others
+        futures = [self.submit_plain(text, voice_id, engine) for text in texts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    def _synthesize_marked(self, texts, voice_id, engine):
+        """Join texts into one SSML document and slice the audio at per-text marks"""
+        # Texts are escaped, so user input can't add markup; the random
+        # prefix also keeps mark names unique to this batch
+        prefix = f"batch{uuid.uuid4().hex}_"
+        names = [f"{prefix}{i}" for i in range(len(texts))]
+        
+        # A mark before each text tells us where its audio starts
+        buf = io.StringIO()
+        buf.write('<speak>')
+        for name, text in zip(names, texts):
+            buf.write(f'<mark name="{name}"/>')
+            buf.write(escape(text))
+        buf.write('</speak>')
+        ssml = buf.getvalue()
+        
+        def synthesize(**kwargs):
+            return self.polly_client.synthesize_speech(
+                Text=ssml, TextType='ssml', VoiceId=voice_id, Engine=engine, **kwargs
+            )['AudioStream'].read()
+        
+        audio = synth_executor.submit(synthesize, OutputFormat='mp3')
+        marks = synth_executor.submit(synthesize, OutputFormat='json', SpeechMarkTypes=['ssml'])
+        
+        times = {}
+        for line in marks.result().decode('utf-8').splitlines():
+            if line.strip():
+                mark = json.loads(line)
+                if mark['value'] in times:
+                    raise ValueError(f"Duplicate speech mark {mark['value']}")
+                times[mark['value']] = mark['time']
+        
+        if sorted(times) != sorted(names):
+            raise ValueError('Speech marks do not match the batched texts')
+        return split_mp3(audio.result(), [times[name] for name in names[1:]])
     
     def generate_audio(self, text, voice_id='Joanna', engine='neural', 
                       use_ssml=False, rate='medium', pitch='medium'):
-        """Generate audio and return file path"""
+        """Generate audio (or reuse a cached copy) and return file path"""
         try:
-            # Create unique filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"podcast_{voice_id}_{timestamp}.mp3"
-            output_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+            # Identical requests map to the same file
+            filename, output_path = self.cache_path(text, voice_id, engine, use_ssml, rate, pitch)
+            
+            if os.path.exists(output_path):
+                # Bump access time for LRU eviction
+                os.utime(output_path)
+                return {
+                    'success': True,
+                    'filename': filename,
+                    'path': output_path,
+                    'size': os.path.getsize(output_path),
+                    'cached': True
+                }
+            
+            # Polly caps characters per request, so long text is split on
+            # sentence boundaries and synthesized in parallel
+            chunks = self.chunk_text(text, engine, use_ssml)
             
-            if use_ssml:
-                ssml_text = self.create_ssml_with_prosody(text, rate, pitch)
-                response = self.polly_client.synthesize_speech(
-                    Text=ssml_text,
-                    TextType='ssml',
-                    OutputFormat='mp3',
-                    VoiceId=voice_id,
-                    Engine=engine
-                )
+            if (not use_ssml and len(chunks) == 1
+                    and len(chunks[0]) <= app.config['BATCH_ITEM_MAX_CHARS']):
+                # Short plain-text snippets share a Polly call with others for
+                # the same voice. SSML requests are never batched, since one
+                # malformed document would fail the whole batch
+                future = self.coalescer.submit((voice_id, engine), chunks[0], len(chunks[0]))
+                parts = [future.result()]
             else:
-                response = self.polly_client.synthesize_speech(
-                    Text=text,
-                    OutputFormat='mp3',
-                    VoiceId=voice_id,
-                    Engine=engine
-                )
+                # Every synthesize_speech call goes through the shared pool, so
+                # in-flight requests never outnumber pooled connections
+                parts = list(synth_executor.map(
+                    lambda chunk: self.synthesize_chunk(chunk, voice_id, engine, use_ssml, rate, pitch),
+                    chunks
+                ))
             
-            # Save audio file
-            with open(output_path, 'wb') as f:
-                f.write(response['AudioStream'].read())
+            # MP3 frames are self-contained, so chunks can be concatenated.
+            # Save atomically so readers never see a partial MP3
+            tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                for part in parts:
+                    f.write(part)
+            os.replace(tmp_path, output_path)
             
             file_size = os.path.getsize(output_path)
+            self.prune_cache()
             
             return {
                 'success': True,
                 'filename': filename,
                 'path': output_path,
-                'size': file_size
+                'size': file_size,
+                'cached': False
             }
             
         except Exception as e:
@@ -110,9 +365,51 @@ class PodcastGenerator:
                 'error': str(e)
             }
 
+    def stream_audio(self, text, output_path, voice_id='Joanna', engine='neural',
+                     use_ssml=False, rate='medium', pitch='medium'):
+        """Start synthesis and return a generator of MP3 bytes that also fills the cache"""
+        chunks = self.chunk_text(text, engine, use_ssml)
+        # Request the first chunk now so Polly errors (bad voice, throttling,
+        # invalid SSML) are raised before any response has been sent
+        first = self.synthesize_stream(chunks[0], voice_id, engine, use_ssml, rate, pitch)
+        return self._stream_chunks(first, chunks[1:], output_path, voice_id, engine,
+                                   use_ssml, rate, pitch)
+    
+    def _stream_chunks(self, first, chunks, output_path, voice_id, engine,
+                       use_ssml, rate, pitch):
+        """Yield MP3 bytes as Polly produces them, saving a copy to the cache"""
+        tmp_path = f"{output_path}.{threading.get_ident()}.tmp"
+        completed = False
+        stream = first
+        try:
+            with open(tmp_path, 'wb') as f:
+                while True:
+                    for data in stream.iter_chunks(STREAM_CHUNK_SIZE):
+                        f.write(data)
+                        yield data
+                    if not chunks:
+                        break
+                    stream = self.synthesize_stream(chunks.pop(0), voice_id, engine, use_ssml, rate, pitch)
+            os.replace(tmp_path, output_path)
+            completed = True
+            self.prune_cache()
+        finally:
+            # Client disconnected or Polly failed: drop the partial file
+            if not completed:
+                stream.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
 # Initialize generator
 generator = PodcastGenerator()
 
+# Background synthesis jobs, keyed by job id
+executor = ThreadPoolExecutor(max_workers=app.config['GENERATE_WORKERS'])
+# Individual Polly requests, shared by all jobs
+synth_executor = ThreadPoolExecutor(max_workers=app.config['POLLY_CONCURRENCY'])
+jobs = {}
+jobs_lock = threading.Lock()
+
 @app.route('/')
 def index():
     """Render main page"""
@@ -124,46 +421,131 @@ def get_voices():
     voices = generator.get_available_voices()
     return jsonify(voices)
 
+def read_generate_params(data):
+    """Extract synthesis parameters from a JSON body or query string"""
+    use_ssml = data.get('useSSML', False)
+    if isinstance(use_ssml, str):
+        use_ssml = use_ssml.lower() in ('1', 'true', 'yes')
+    
+    return (
+        data.get('text', '').strip(),
+        data.get('voice', 'Joanna'),
+        data.get('engine', 'neural'),
+        use_ssml,
+        data.get('rate', 'medium'),
+        data.get('pitch', 'medium')
+    )
+
+def validate_text(text):
+    """Return an error response if the text cannot be synthesized"""
+    if not text:
+        return jsonify({'success': False, 'error': 'No text provided'}), 400
+    
+    # Check character limit
+    max_chars = app.config['MAX_TEXT_CHARS']
+    if len(text) > max_chars:
+        return jsonify({
+            'success': False, 
+            'error': f'Text too long. Maximum {max_chars} characters.'
+        }), 400
+    
+    return None
+
+def prune_jobs():
+    """Drop finished jobs older than the TTL (jobs_lock must be held)"""
+    cutoff = time.time() - app.config['JOB_TTL_SECONDS']
+    expired = [job_id for job_id, job in jobs.items()
+               if job['finished'] is not None and job['finished'] < cutoff]
+    for job_id in expired:
+        del jobs[job_id]
+
+def submit_generate_job(text, voice_id, engine, use_ssml, rate, pitch):
+    """Generate audio in the background and return the job details"""
+    job_id = uuid.uuid4().hex
+    job = {'future': executor.submit(
+        generator.generate_audio, text, voice_id, engine, use_ssml, rate, pitch
+    ), 'finished': None}
+    job['future'].add_done_callback(lambda _: job.update(finished=time.time()))
+    
+    with jobs_lock:
+        prune_jobs()
+        jobs[job_id] = job
+    
+    return jsonify({
+        'success': True,
+        'jobId': job_id,
+        'statusUrl': f"/api/status/{job_id}",
+        'pollInterval': app.config['STATUS_POLL_INTERVAL_MS']
+    }), 202
+
 @app.route('/api/generate', methods=['POST'])
 def generate_podcast():
     """API endpoint to generate podcast"""
     try:
-        data = request.json
+        text, voice_id, engine, use_ssml, rate, pitch = read_generate_params(request.json)
         
-        text = data.get('text', '').strip()
-        voice_id = data.get('voice', 'Joanna')
-        engine = data.get('engine', 'neural')
-        use_ssml = data.get('useSSML', False)
-        rate = data.get('rate', 'medium')
-        pitch = data.get('pitch', 'medium')
+        error = validate_text(text)
+        if error:
+            return error
         
-        if not text:
-            return jsonify({'success': False, 'error': 'No text provided'}), 400
+        return submit_generate_job(text, voice_id, engine, use_ssml, rate, pitch)
+            
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/generate_stream', methods=['GET', 'POST'])
+def generate_podcast_stream():
+    """API endpoint to stream podcast audio while it is being synthesized"""
+    try:
+        data = request.json if request.is_json else request.values
+        text, voice_id, engine, use_ssml, rate, pitch = read_generate_params(data)
         
-        # Check character limit
-        max_chars = 3000 if engine == 'neural' else 6000
-        if len(text) > max_chars:
-            return jsonify({
-                'success': False, 
-                'error': f'Text too long. Maximum {max_chars} characters for {engine} engine.'
-            }), 400
+        error = validate_text(text)
+        if error:
+            return error
         
-        # Generate audio
-        result = generator.generate_audio(text, voice_id, engine, use_ssml, rate, pitch)
+        _, output_path = generator.cache_path(text, voice_id, engine, use_ssml, rate, pitch)
+        if os.path.exists(output_path):
+            os.utime(output_path)
+            return send_file(output_path, mimetype='audio/mpeg')
+        
+        audio = generator.stream_audio(text, output_path, voice_id, engine, use_ssml, rate, pitch)
+        return Response(stream_with_context(audio), mimetype='audio/mpeg')
         
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'filename': result['filename'],
-                'size': result['size'],
-                'downloadUrl': f"/download/{result['filename']}"
-            })
-        else:
-            return jsonify({'success': False, 'error': result['error']}), 500
-            
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/status/<job_id>')
+def generate_status(job_id):
+    """API endpoint to check a podcast generation job"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    
+    future = job['future']
+    if not future.done():
+        return jsonify({'success': True, 'status': 'pending'})
+    
+    with jobs_lock:
+        jobs.pop(job_id, None)
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    if result['success']:
+        return jsonify({
+            'success': True,
+            'status': 'done',
+            'filename': result['filename'],
+            'size': result['size'],
+            'cached': result['cached'],
+            'downloadUrl': f"/download/{result['filename']}"
+        })
+    else:
+        return jsonify({'success': False, 'status': 'failed', 'error': result['error']}), 500
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """API endpoint to upload text file"""
@@ -188,12 +570,65 @@ def upload_file():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/upload_and_generate', methods=['POST'])
+def upload_and_generate():
+    """API endpoint to generate podcast straight from an uploaded text file"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'success': False, 'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        
+        if file.filename == '':
+            return jsonify({'success': False, 'error': 'No file selected'}), 400
+        
+        # Decode the upload block by block into a single string, giving up
+        # as soon as it passes the character limit
+        max_chars = app.config['MAX_TEXT_CHARS']
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            text = ''
+            content_len = 0  # Length of text without trailing whitespace
+            for block in iter(lambda: file.stream.read(UPLOAD_BLOCK_SIZE), b''):
+                chunk = decoder.decode(block)
+                if not text:
+                    chunk = chunk.lstrip()
+                text += chunk
+                trimmed = chunk.rstrip()
+                if trimmed:
+                    content_len = len(text) - (len(chunk) - len(trimmed))
+                if content_len > max_chars:
+                    return jsonify({
+                        'success': False,
+                        'error': f'Text too long. Maximum {max_chars} characters.'
+                    }), 400
+            text += decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return jsonify({'success': False, 'error': 'File must be UTF-8 text'}), 400
+        text = text.strip()
+        
+        _, voice_id, engine, use_ssml, rate, pitch = read_generate_params(request.form)
+        
+        error = validate_text(text)
+        if error:
+            return error
+        
+        return submit_generate_job(text, voice_id, engine, use_ssml, rate, pitch)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/download/<filename>')
 def download_file(filename):
     """Download generated audio file"""
     try:
-        file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-        return send_file(file_path, as_attachment=True)
+        # send_from_directory rejects paths escaping the folder via safe_join.
+        # Conditional responses let repeat and range requests (used by the
+        # audio player) skip resending the whole file
+        return send_from_directory(
+            CACHE_DIR, filename,
+            as_attachment=True, conditional=True, etag=True, max_age=3600
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
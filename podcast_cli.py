@@ -1,32 +1,43 @@
-import boto3
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from polly_utils import create_polly_client, describe_voices_cached
 
 load_dotenv()
 
 class PodcastCLI:
     def __init__(self):
-        self.polly_client = boto3.client(
-            'polly',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'us-east-1')
-        )
+        self.polly_client = create_polly_client()
+        # Keeps output from concurrent generate_audio calls from interleaving
+        self.print_lock = threading.Lock()
         self.voices = self.load_voices()
+        # Flatten and index once so menus and lookups don't rescan every language
+        self.all_voices = [v for voices in self.voices.values() for v in voices]
+        self.voices_by_name = {v['Name']: v for v in self.all_voices}
     
     def load_voices(self):
         """Load available voices grouped by language"""
         try:
-            response = self.polly_client.describe_voices()
             voices = {}
             
-            for voice in response['Voices']:
+            for voice in describe_voices_cached(self.polly_client):
                 lang = voice['LanguageCode']
                 if lang not in voices:
                     voices[lang] = []
-                voices[lang].append(voice)
+                
+                # Precompute engine support so menus don't rescan it
+                engines = voice.get('SupportedEngines', [])
+                supports_neural = 'neural' in engines
+                voices[lang].append(dict(
+                    voice,
+                    _supports_neural=supports_neural,
+                    _supports_standard='standard' in engines,
+                    _engine_label="Neural ⚡" if supports_neural else "Standard"
+                ))
             
             return voices
         except Exception as e:
@@ -60,8 +71,7 @@ class PodcastCLI:
                 selected_lang = langs[choice - 1]
                 print(f"\n🎙️  Voices for {selected_lang}:")
                 for i, voice in enumerate(self.voices[selected_lang], 1):
-                    engine = "Neural ⚡" if "neural" in voice.get('SupportedEngines', []) else "Standard"
-                    print(f"{i}. {voice['Name']:15} | {voice['Gender']:7} | {engine}")
+                    print(f"{i}. {voice['Name']:15} | {voice['Gender']:7} | {voice['_engine_label']}")
             else:
                 print("Invalid choice!")
         except ValueError:
@@ -69,15 +79,17 @@ class PodcastCLI:
     
     def text_input_mode(self):
         """Convert text entered by user"""
-        print("\n✍️  Enter your text (type 'END' on a new line when done):")
+        print("\n✍️  Enter or paste your text, then type 'END' on a new line or press "
+              "Ctrl-D (Ctrl-Z then Enter on Windows) when done:")
+        # Stop at whichever terminator comes first. Reading past an 'END'
+        # line would swallow the remaining answers in piped input, and a
+        # terminal hands over at most one line per read anyway
         lines = []
-        while True:
-            line = input()
+        for line in iter(sys.stdin.readline, ''):
             if line.strip().upper() == 'END':
                 break
             lines.append(line)
-        
-        text = ' '.join(lines)
+        text = ''.join(lines)
         
         if not text.strip():
             print("No text entered!")
@@ -153,12 +165,7 @@ class PodcastCLI:
         try:
             choice = int(input("\nYour choice: "))
             if 1 <= choice <= len(popular):
-                voice_name = popular[choice - 1]
-                # Find voice details
-                for voices in self.voices.values():
-                    for v in voices:
-                        if v['Name'] == voice_name:
-                            return v
+                return self.voices_by_name.get(popular[choice - 1])
             elif choice == len(popular) + 1:
                 return self.select_from_all_voices()
             else:
@@ -170,9 +177,7 @@ class PodcastCLI:
     
     def select_from_all_voices(self):
         """Show all voices for selection"""
-        all_voices = []
-        for voices in self.voices.values():
-            all_voices.extend(voices)
+        all_voices = self.all_voices
         
         print("\nAll Available Voices:")
         for i, voice in enumerate(all_voices, 1):
@@ -191,9 +196,7 @@ class PodcastCLI:
     
     def select_engine(self, voice):
         """Select neural or standard engine"""
-        supported = voice.get('SupportedEngines', [])
-        
-        if 'neural' in supported and 'standard' in supported:
+        if voice['_supports_neural'] and voice['_supports_standard']:
             print("\nEngine:")
             print("1. Neural (more natural, recommended)")
             print("2. Standard")
@@ -203,7 +206,7 @@ class PodcastCLI:
                 return 'neural' if choice == 1 else 'standard'
             except ValueError:
                 return 'neural'
-        elif 'neural' in supported:
+        elif voice['_supports_neural']:
             return 'neural'
         else:
             return 'standard'
@@ -213,16 +216,18 @@ class PodcastCLI:
         try:
             Path(output_file).parent.mkdir(parents=True, exist_ok=True)
             
-            print("\n🎵 Generating audio...")
-            print(f"   Voice: {voice_id}")
-            print(f"   Engine: {engine}")
-            print(f"   Text length: {len(text)} characters")
+            with self.print_lock:
+                print("\n🎵 Generating audio...")
+                print(f"   Voice: {voice_id}")
+                print(f"   Engine: {engine}")
+                print(f"   Text length: {len(text)} characters")
             
             # Check if text is too long
             max_chars = 3000 if engine == 'neural' else 6000
             if len(text) > max_chars:
-                print(f"\n⚠️  Text is too long ({len(text)} chars, max {max_chars})")
-                print("Consider splitting into multiple files.")
+                with self.print_lock:
+                    print(f"\n⚠️  Text is too long ({len(text)} chars, max {max_chars})")
+                    print("Consider splitting into multiple files.")
                 return
             
             response = self.polly_client.synthesize_speech(
@@ -236,12 +241,14 @@ class PodcastCLI:
                 f.write(response['AudioStream'].read())
             
             file_size = os.path.getsize(output_file)
-            print(f"\n✅ SUCCESS!")
-            print(f"   File: {output_file}")
-            print(f"   Size: {file_size / 1024:.2f} KB")
+            with self.print_lock:
+                print(f"\n✅ SUCCESS!")
+                print(f"   File: {output_file}")
+                print(f"   Size: {file_size / 1024:.2f} KB")
             
         except Exception as e:
-            print(f"\n❌ Error: {e}")
+            with self.print_lock:
+                print(f"\n❌ Error ({voice_id}): {e}")
     
     def sample_voices_mode(self):
         """Generate samples with different voices"""
@@ -253,9 +260,13 @@ class PodcastCLI:
         
         print(f"\n🎵 Generating samples for {len(voices_to_try)} voices...")
         
-        for voice_name in voices_to_try:
+        def generate_sample(voice_name):
             output_file = f"output/sample_{voice_name.lower()}.mp3"
             self.generate_audio(sample_text, output_file, voice_name, 'neural')
+        
+        # Samples are independent, so request them all at once
+        with ThreadPoolExecutor(max_workers=len(voices_to_try)) as pool:
+            list(pool.map(generate_sample, voices_to_try))
     
     def run(self):
         """Main loop"""
@@ -282,7 +293,8 @@ class PodcastCLI:
                 else:
                     print("\n❌ Invalid option!")
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
+                # EOF means input is exhausted, so retrying would loop forever
                 print("\n\n👋 Goodbye!")
                 break
             except Exception as e:
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import boto3
+from botocore.config import Config
+
+VOICES_CACHE_FILE = os.path.join('output', '.voices_cache.json')
+VOICES_CACHE_TTL = 24 * 60 * 60  # Voice catalog changes rarely
+
+# Keep connections alive and pooled so each synthesize_speech call
+# skips a fresh TCP + TLS handshake
+POLLY_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    connect_timeout=3,
+    read_timeout=30,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+
+_voices_lock = threading.Lock()
+_voices_memo = {'ts': 0.0, 'voices': None}
+
+
+def create_polly_client():
+    """Create a Polly client from environment credentials"""
+    return boto3.client(
+        'polly',
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.getenv('AWS_REGION', 'us-east-1'),
+        config=POLLY_CONFIG
+    )
+
+
+def _read_voices_cache(cache_file, ttl):
+    """Return cached voices from disk if the file is still fresh"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if time.time() - cached['ts'] < ttl:
+            return cached['ts'], cached['voices']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_voices_cache(cache_file, ts, voices):
+    """Persist voices atomically (write to tmp file, then rename)"""
+    try:
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'ts': ts, 'voices': voices}, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Could not write voices cache: {e}")
+
+
+def _fetch_voices(polly_client, cache_file):
+    """Call Polly for the voice list and store it in both caches"""
+    now = time.time()
+    voices = polly_client.describe_voices()['Voices']
+    _write_voices_cache(cache_file, now, voices)
+    _voices_memo['ts'], _voices_memo['voices'] = now, voices
+    return voices
+
+
+def refresh_voices_cache(polly_client, cache_file=VOICES_CACHE_FILE):
+    """Fetch the voice list from Polly, bypassing any cached copy"""
+    with _voices_lock:
+        return _fetch_voices(polly_client, cache_file)
+
+
+def describe_voices_cached(polly_client, cache_file=VOICES_CACHE_FILE,
+                           ttl=VOICES_CACHE_TTL):
+    """Return Polly's raw voice list, cached in-process and on disk"""
+    with _voices_lock:
+        now = time.time()
+        if _voices_memo['voices'] is not None and now - _voices_memo['ts'] < ttl:
+            return _voices_memo['voices']
+
+        cached = _read_voices_cache(cache_file, ttl)
+        if cached is None:
+            return _fetch_voices(polly_client, cache_file)
+
+        _voices_memo['ts'], _voices_memo['voices'] = cached
+        return cached[1]
+
+
+# MP3 frame header tables (Layer III only, which is what Polly returns)
+_MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],   # MPEG 2.5
+}
+
+
+def mp3_frame_times(data):
+    """Return (byte offset, start time in ms) for every MP3 frame in data"""
+    frames = []
+    pos = 0
+    elapsed_ms = 0.0
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version = (b1 >> 3) & 3
+        bitrate_idx = b2 >> 4
+        rate_idx = (b2 >> 2) & 3
+        if (data[pos] != 0xFF or (b1 & 0xE0) != 0xE0 or version == 1
+                or (b1 >> 1) & 3 != 1 or bitrate_idx in (0, 15) or rate_idx == 3):
+            pos += 1
+            continue
+
+        table = 'mpeg1' if version == 3 else 'mpeg2'
+        bitrate = _MP3_BITRATES[table][bitrate_idx] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+        samples = 1152 if version == 3 else 576
+        length = samples // 8 * bitrate // sample_rate + ((b2 >> 1) & 1)
+
+        frames.append((pos, elapsed_ms))
+        elapsed_ms += samples * 1000 / sample_rate
+        pos += length
+    return frames
+
+
+def split_mp3(data, times_ms):
+    """Cut MP3 data at the first frame boundary at or after each time"""
+    frames = mp3_frame_times(data)
+    cuts = [0]
+    for t in times_ms:
+        offset = next((off for off, start in frames if start >= t), len(data))
+        cuts.append(max(offset, cuts[-1]))
+    cuts.append(len(data))
+    return [data[start:end] for start, end in zip(cuts, cuts[1:])]
+
+
+class BatchCoalescer:
+    """Collect small requests per key for a short window and flush them together"""
+
+    def __init__(self, flush_fn, window_ms=100, max_items=8, max_chars=1500):
+        # flush_fn(key, items) must return one result per item, in order.
+        # An exception instance in the results fails only that item's future
+        self.flush_fn = flush_fn
+        self.window = window_ms / 1000
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def submit(self, key, item, size):
+        """Queue an item and return a Future for its result"""
+        future = Future()
+        ready = []
+        with self.lock:
+            batch = self.pending.get(key)
+            if batch and batch['chars'] + size > self.max_chars:
+                ready.append((key, self._take(key)))
+                batch = None
+
+            if batch is None:
+                batch = {'entries': [], 'chars': 0}
+                batch['timer'] = threading.Timer(self.window, self._on_timer, (key, batch))
+                batch['timer'].daemon = True
+                self.pending[key] = batch
+                batch['timer'].start()
+
+            batch['entries'].append((future, item))
+            batch['chars'] += size
+            if len(batch['entries']) >= self.max_items:
+                ready.append((key, self._take(key)))
+
+        for ready_key, entries in ready:
+            self._run(ready_key, entries)
+        return future
+
+    def _take(self, key):
+        """Remove a pending batch (lock must be held) and return its entries"""
+        batch = self.pending.pop(key)
+        batch['timer'].cancel()
+        return batch['entries']
+
+    def _on_timer(self, key, batch):
+        with self.lock:
+            # The batch may already have been flushed for being full
+            if self.pending.get(key) is not batch:
+                return
+            entries = self._take(key)
+        self._run(key, entries)
+
+    def _run(self, key, entries):
+        try:
+            results = self.flush_fn(key, [item for _, item in entries])
+        except Exception as e:
+            for future, _ in entries:
+                future.set_exception(e)
+            return
+        for (future, _), result in zip(entries, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,77 @@
+import io
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import app
+
+
+class FakePolly:
+    """Polly stand-in that returns the request text as audio"""
+
+    def synthesize_speech(self, Text, **kwargs):
+        return {'AudioStream': io.BytesIO(Text.encode('utf-8'))}
+
+
+class SynthesizeBatchTest(unittest.TestCase):
+    def setUp(self):
+        # Skip __init__ so no warm-up thread calls AWS
+        self.generator = app.PodcastGenerator.__new__(app.PodcastGenerator)
+        self.generator.polly_client = FakePolly()
+
+    def test_failed_batches_retry_without_deadlocking_a_small_pool(self):
+        pool = ThreadPoolExecutor(max_workers=2)
+        # Cancelling queued work releases any workers stuck on a deadlock
+        self.addCleanup(pool.shutdown, wait=False, cancel_futures=True)
+        results = {}
+
+        def run_batch(name, texts):
+            results[name] = self.generator.synthesize_batch(('Joanna', 'neural'), texts)
+
+        with mock.patch.object(app, 'synth_executor', pool), \
+                mock.patch.object(self.generator, '_synthesize_marked',
+                                  side_effect=RuntimeError('Throttled')):
+            threads = [
+                threading.Thread(target=run_batch, args=(name, [f'{name} one', f'{name} two']),
+                                 daemon=True)
+                for name in ('a', 'b')
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+                self.assertFalse(thread.is_alive(), 'batch fallback deadlocked')
+
+        self.assertEqual(results['a'], [b'a one', b'a two'])
+        self.assertEqual(results['b'], [b'b one', b'b two'])
+
+
+class CreateSsmlTest(unittest.TestCase):
+    def test_wraps_text_in_prosody_with_pauses(self):
+        generator = app.PodcastGenerator.__new__(app.PodcastGenerator)
+
+        ssml = generator.create_ssml_with_prosody('Hi, there.  How are you?', 'slow', 'low')
+
+        self.assertEqual(
+            ssml,
+            '<speak><prosody rate="slow" pitch="low">'
+            'Hi,<break time="300ms"/> there.<break time="500ms"/> How are you?'
+            '</prosody></speak>'
+        )
+
+
+class UploadAndGenerateTest(unittest.TestCase):
+    def test_non_utf8_upload_is_rejected(self):
+        client = app.app.test_client()
+        response = client.post('/api/upload_and_generate', data={
+            'file': (io.BytesIO(b'caf\xe9 au lait'), 'notes.txt'),
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(),
+                         {'success': False, 'error': 'File must be UTF-8 text'})
+
+
+if __name__ == '__main__':
+    unittest.main()
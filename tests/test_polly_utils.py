@@ -0,0 +1,115 @@
+import unittest
+
+from polly_utils import BatchCoalescer, mp3_frame_times, split_mp3
+
+
+def mpeg2_frame(fill):
+    """Build a 144-byte MPEG-2 Layer III frame (48 kbps, 24 kHz, 24 ms)"""
+    header = bytes([0xFF, 0xF3, 0x64, 0x00])
+    return header + bytes([fill]) * 140
+
+
+class Mp3FrameTimesTest(unittest.TestCase):
+    def test_offsets_and_times_of_mpeg2_frames(self):
+        data = mpeg2_frame(1) * 3
+
+        self.assertEqual(mp3_frame_times(data), [(0, 0.0), (144, 24.0), (288, 48.0)])
+
+    def test_skips_bytes_that_are_not_a_frame_header(self):
+        data = b'\x00\x01' + mpeg2_frame(1) * 2
+
+        self.assertEqual(mp3_frame_times(data), [(2, 0.0), (146, 24.0)])
+
+
+class SplitMp3Test(unittest.TestCase):
+    def test_slices_per_text_at_frame_boundaries(self):
+        # Three texts: frames 0-1, frames 2-4 and frame 5
+        first = mpeg2_frame(1) * 2
+        second = mpeg2_frame(2) * 3
+        third = mpeg2_frame(3)
+
+        parts = split_mp3(first + second + third, [48, 120])
+
+        self.assertEqual(parts, [first, second, third])
+
+    def test_mark_between_frames_cuts_at_the_next_frame(self):
+        data = mpeg2_frame(1) * 4
+
+        parts = split_mp3(data, [30])
+
+        self.assertEqual([len(part) for part in parts], [288, 288])
+
+    def test_marks_past_the_end_give_empty_slices(self):
+        data = mpeg2_frame(1) * 2
+
+        parts = split_mp3(data, [24, 1000])
+
+        self.assertEqual([len(part) for part in parts], [144, 144, 0])
+
+
+class BatchCoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def flush(self, key, items):
+        self.batches.append((key, list(items)))
+        return [item.upper() for item in items]
+
+    def test_flushes_when_batch_is_full(self):
+        coalescer = BatchCoalescer(self.flush, window_ms=10000, max_items=2)
+
+        futures = [coalescer.submit('Joanna', text, 1) for text in ('a', 'b')]
+
+        self.assertEqual([f.result(timeout=1) for f in futures], ['A', 'B'])
+        self.assertEqual(self.batches, [('Joanna', ['a', 'b'])])
+
+    def test_flushes_after_the_window(self):
+        coalescer = BatchCoalescer(self.flush, window_ms=10, max_items=8)
+
+        future = coalescer.submit('Joanna', 'a', 1)
+
+        self.assertEqual(future.result(timeout=1), 'A')
+
+    def test_starts_a_new_batch_past_the_character_limit(self):
+        coalescer = BatchCoalescer(self.flush, window_ms=50, max_items=8, max_chars=5)
+
+        sizes = {'a': 3, 'b': 3, 'c': 2}
+        futures = [coalescer.submit('Joanna', text, sizes[text]) for text in ('a', 'b', 'c')]
+
+        self.assertEqual([f.result(timeout=1) for f in futures], ['A', 'B', 'C'])
+        self.assertEqual(self.batches, [('Joanna', ['a']), ('Joanna', ['b', 'c'])])
+
+    def test_keys_are_batched_separately(self):
+        coalescer = BatchCoalescer(self.flush, window_ms=10000, max_items=2)
+
+        futures = [coalescer.submit(key, key, 1)
+                   for key in ('Joanna', 'Matthew', 'Joanna', 'Matthew')]
+
+        self.assertEqual([f.result(timeout=1) for f in futures],
+                         ['JOANNA', 'MATTHEW', 'JOANNA', 'MATTHEW'])
+        self.assertEqual(sorted(key for key, _ in self.batches), ['Joanna', 'Matthew'])
+
+    def test_exception_result_fails_only_that_item(self):
+        def flush(key, items):
+            return [ValueError('bad') if item == 'x' else item for item in items]
+
+        coalescer = BatchCoalescer(flush, window_ms=10000, max_items=3)
+        futures = [coalescer.submit('Joanna', text, 1) for text in ('a', 'x', 'b')]
+
+        self.assertEqual(futures[0].result(timeout=1), 'a')
+        self.assertIsInstance(futures[1].exception(timeout=1), ValueError)
+        self.assertEqual(futures[2].result(timeout=1), 'b')
+
+    def test_flush_error_fails_the_whole_batch(self):
+        def flush(key, items):
+            raise RuntimeError('Polly unavailable')
+
+        coalescer = BatchCoalescer(flush, window_ms=10000, max_items=2)
+        futures = [coalescer.submit('Joanna', text, 1) for text in ('a', 'b')]
+
+        for future in futures:
+            self.assertIsInstance(future.exception(timeout=1), RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()